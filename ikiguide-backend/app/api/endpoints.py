@@ -1,17 +1,37 @@
 from fastapi import APIRouter, HTTPException, Request, Response, Depends
-from fastapi.responses import JSONResponse
-from typing import Dict, Any, Optional
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Any, Optional, Tuple
 from app.models.logger import logger
-import traceback
-import json
+import logging
+import asyncio
+import time
 import msal
+import orjson
+import msgspec
 import requests
+import httpx
 from app.config import settings
-from app.models.session import session_manager, SessionError
-from app.services.openai_service import generate_ikiguide
+from app.models.session import session_manager, Session, SessionError
+from app.models.payloads import ResponsePayload
+from app.services.openai_service import generate_ikiguide, REQUIRED_KEY_SET, RESPONSE_KEY_MAP
 import os
 
-router = APIRouter()
+class ORJSONResponse(Response):
+    """
+    JSON response rendered with orjson.
+    
+    Non-string keys are allowed since session responses are keyed by
+    integer question IDs.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Responses rejected as placeholder input when every answer matches
+PLACEHOLDER_RESPONSES = frozenset({'testing'})
 
 class APIError(Exception):
     """
@@ -29,8 +49,8 @@ async def api_error_handler(request: Request, exc: APIError):
     :param exc: API exception
     :return: JSON response with error details
     """
-    logger.error(f"API Error: {exc.message}")
-    return JSONResponse(
+    logger.error("API Error: %s", exc.message)
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": True,
@@ -38,6 +58,93 @@ async def api_error_handler(request: Request, exc: APIError):
         }
     )
 
+def create_msal_app() -> Optional[msal.ConfidentialClientApplication]:
+    """
+    Create the Azure AD client used to acquire Microsoft Graph tokens.
+    
+    :return: MSAL application, or None if Azure is not configured
+    """
+    if not settings.validate_azure_config():
+        return None
+    
+    try:
+        return msal.ConfidentialClientApplication(
+            settings.AZURE_CLIENT_ID,
+            authority=f"https://login.microsoftonline.com/{settings.AZURE_TENANT_ID}",
+            client_credential=settings.AZURE_CLIENT_SECRET
+        )
+    except Exception as e:
+        logger.error("Failed to initialize MSAL application: %s", e)
+        return None
+
+# MSAL caches tokens per application instance, so share a single instance.
+# It is built on first use, since construction contacts Azure AD
+_msal_app: Optional[msal.ConfidentialClientApplication] = None
+_msal_lock: Optional[asyncio.Lock] = None
+_msal_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _get_msal_lock() -> asyncio.Lock:
+    """
+    Return the lock guarding the shared MSAL application, creating it for
+    the running event loop on first use.
+    
+    :return: Lock bound to the running event loop
+    """
+    global _msal_lock, _msal_lock_loop
+    loop = asyncio.get_running_loop()
+    if _msal_lock is None or _msal_lock_loop is not loop:
+        _msal_lock = asyncio.Lock()
+        _msal_lock_loop = loop
+    return _msal_lock
+
+async def get_msal_app() -> Optional[msal.ConfidentialClientApplication]:
+    """
+    Return the shared MSAL application, creating it off the event loop if
+    it does not exist yet. A failed attempt is retried on the next call.
+    
+    :return: MSAL application, or None if it could not be created
+    """
+    global _msal_app
+    if _msal_app is None:
+        async with _get_msal_lock():
+            if _msal_app is None:
+                _msal_app = await run_in_threadpool(create_msal_app)
+    return _msal_app
+
+def create_graph_client() -> httpx.AsyncClient:
+    """
+    Create the Microsoft Graph client.
+    
+    :return: HTTP/2 client for the Graph API
+    """
+    return httpx.AsyncClient(
+        base_url="https://graph.microsoft.com",
+        http2=True,
+        timeout=httpx.Timeout(10.0, connect=3.0),
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+    )
+
+# Shared Microsoft Graph client so connections (and TLS sessions) are kept alive
+_graph_client = create_graph_client()
+
+async def close_http_client():
+    """
+    Close the shared outbound HTTP client and replace it with a fresh one,
+    so a later application lifespan can keep sending mail.
+    """
+    global _graph_client
+    await _graph_client.aclose()
+    _graph_client = create_graph_client()
+
+# Session cookie attributes are fixed for the lifetime of the process
+SESSION_COOKIE_KWARGS = dict(
+    key="session_id",
+    httponly=True,
+    secure=settings.SESSION_COOKIE_SECURE,
+    samesite="lax",
+    max_age=settings.SESSION_MAX_AGE  # Use max_age from settings
+)
+
 def set_session_cookie(response, session_id: str):
     """
     Set session cookie with secure and httponly flags.
@@ -45,49 +152,72 @@ def set_session_cookie(response, session_id: str):
     :param response: FastAPI response object
     :param session_id: Session ID to set in cookie
     """
-    response.set_cookie(
-        key="session_id", 
-        value=session_id, 
-        httponly=True, 
-        secure=settings.APP_ENV != "development",
-        samesite="lax",
-        max_age=settings.SESSION_MAX_AGE  # Use max_age from settings
-    )
+    response.set_cookie(value=session_id, **SESSION_COOKIE_KWARGS)
 
-def get_session_id(request: Request) -> str:
+def get_cookie_session_id(request: Request) -> Optional[str]:
     """
-    Retrieve or create a session ID.
+    Read the session ID cookie, parsing it at most once per request.
     
     :param request: Incoming request
-    :return: Session ID
+    :return: Session ID from the cookie, if any
     """
-    # Log all incoming request details for debugging
-    logger.info(f"Request method: {request.method}")
-    logger.info(f"Request URL: {request.url}")
-    logger.info(f"Request headers: {dict(request.headers)}")
+    if not hasattr(request.state, "cookie_session_id"):
+        request.state.cookie_session_id = request.cookies.get("session_id")
+    return request.state.cookie_session_id
+
+def get_session_ctx(request: Request) -> Tuple[str, Session]:
+    """
+    Retrieve or create the session for a request.
     
+    :param request: Incoming request
+    :return: Tuple of (session ID, session)
+    """
     # Extract session ID from cookies
-    session_id = request.cookies.get("session_id")
-    logger.info(f"Existing session_id from cookies: {session_id}")
+    session_id = get_cookie_session_id(request)
+    logger.info("Existing session_id from cookies: %s", session_id)
     
     # Validate session
     if session_id:
         existing_session = session_manager.get_session(session_id)
         if existing_session:
-            logger.info(f"Using existing valid session: {session_id}")
-            return session_id
+            logger.info("Using existing valid session: %s", session_id)
+            return session_id, existing_session
         else:
-            logger.warning(f"Invalid session found: {session_id}")
+            logger.warning("Invalid session found: %s", session_id)
     
     # Create new session if no valid session exists
     try:
         session_id = session_manager.create_session()
-        logger.info(f"Created new session: {session_id}")
-        return session_id
+        logger.info("Created new session: %s", session_id)
+        return session_id, session_manager.get_session(session_id)
     except SessionError as e:
-        logger.error(f"Session creation failed: {e}")
+        logger.error("Session creation failed: %s", e)
         raise APIError("Unable to create session", status_code=500)
 
+async def parse_response_payload(request: Request) -> ResponsePayload:
+    """
+    Decode and validate a response payload straight from the raw body.
+    
+    :param request: Incoming request
+    :return: Validated response payload
+    """
+    try:
+        return msgspec.json.decode(await request.body(), type=ResponsePayload)
+    except msgspec.DecodeError as e:
+        raise APIError(f"Invalid response format: {e}", status_code=400)
+
+async def current_session(request: Request) -> Session:
+    """
+    Dependency resolving the request's session once and caching it on
+    request.state for any later lookups within the same request.
+    
+    :param request: Incoming request
+    :return: Session for the request
+    """
+    if not hasattr(request.state, "session"):
+        request.state.session_id, request.state.session = get_session_ctx(request)
+    return request.state.session
+
 @router.post("/start_session")
 async def start_session(request: Request):
     """
@@ -97,61 +227,58 @@ async def start_session(request: Request):
     :return: Session details
     """
     try:
-        logger.info(f"Start session request received. Headers: {dict(request.headers)}")
-        
         # Check if a session already exists and is valid
-        existing_session_id = request.cookies.get("session_id")
-        logger.info(f"Existing session ID from cookies: {existing_session_id}")
+        existing_session_id = get_cookie_session_id(request)
+        logger.info("Existing session ID from cookies: %s", existing_session_id)
         
         if existing_session_id:
             existing_session = session_manager.get_session(existing_session_id)
             if existing_session:
-                logger.info(f"Existing valid session found: {existing_session_id}")
-                return JSONResponse(content={"session_id": existing_session_id})
+                logger.info("Existing valid session found: %s", existing_session_id)
+                return ORJSONResponse(content={"session_id": existing_session_id})
         
         # If no valid session exists, create a new one
         session_id = session_manager.create_session()
-        logger.info(f"Created new session: {session_id}")
+        logger.info("Created new session: %s", session_id)
         
-        response = JSONResponse(content={"session_id": session_id})
+        response = ORJSONResponse(content={"session_id": session_id})
         set_session_cookie(response, session_id)
         return response
     
     except SessionError as e:
-        logger.error(f"Session start failed: {e}", exc_info=True)
+        logger.error("Session start failed: %s", e)
         raise APIError("Session initialization failed", status_code=500)
 
 @router.get("/session_info")
-async def get_session_info(request: Request):
+async def get_session_info(session: Session = Depends(current_session)):
     """
     Retrieve current session information.
     
-    :param request: Incoming request
+    :param session: Current session
     :return: Session details
     """
-    session_id = get_session_id(request)
-    session = session_manager.get_session(session_id)
-    
     if not session:
         raise APIError("Session not found", status_code=404)
     
+    created_at, last_activity = session.get_timestamps()
+    
     return {
-        "session_id": session_id,
-        "created_at": session._session_data['created_at'].isoformat(),
-        "last_activity": session._session_data['last_activity'].isoformat(),
-        "data": session._session_data['user_data']
+        "session_id": session.session_id,
+        "created_at": created_at.isoformat(),
+        "last_activity": last_activity.isoformat(),
+        "data": session.get_user_data()
     }
 
 @router.post("/update_session")
-async def update_session(request: Request, data: Dict[str, Any]):
+async def update_session(data: Dict[str, Any], session: Session = Depends(current_session)):
     """
     Update session with provided data.
     
-    :param request: Incoming request
     :param data: Data to update in session
+    :param session: Current session
     :return: Update status
     """
-    session_id = get_session_id(request)
+    session_id = session.session_id
     
     try:
         updated = session_manager.update_session(session_id, data)
@@ -161,49 +288,93 @@ async def update_session(request: Request, data: Dict[str, Any]):
         return {"success": True, "message": "Session updated successfully"}
     
     except Exception as e:
-        logger.error(f"Session update error: {e}")
+        logger.error("Session update error: %s", e)
         raise APIError("Unable to update session", status_code=500)
 
 @router.delete("/end_session")
-async def end_session(request: Request):
+async def end_session(session: Session = Depends(current_session)):
     """
     Terminate the current session.
     
-    :param request: Incoming request
+    :param session: Current session
     :return: Session termination status
     """
-    session_id = get_session_id(request)
+    session_id = session.session_id
     
     try:
         deleted = session_manager.delete_session(session_id)
         if not deleted:
             raise APIError("Session termination failed", status_code=400)
         
-        response = JSONResponse(content={"success": True, "message": "Session terminated"})
+        response = ORJSONResponse(content={"success": True, "message": "Session terminated"})
         response.delete_cookie("session_id")
         return response
     
     except Exception as e:
-        logger.error(f"Session termination error: {e}")
+        logger.error("Session termination error: %s", e)
         raise APIError("Unable to terminate session", status_code=500)
 
-@router.get('/health')
-async def health_check():
-    health_status = {}
+# Pre-encoded /health response headers and bodies, keyed by OpenAI reachability
+HEALTH_RESPONSES = {}
+for _healthy in (True, False):
+    _body = orjson.dumps({'openai': _healthy})
+    HEALTH_RESPONSES[_healthy] = (
+        [(b"content-type", b"application/json"), (b"content-length", str(len(_body)).encode())],
+        _body
+    )
 
-    # Check OpenAI connection
-    try:
-        response = requests.get('https://api.openai.com/v1/models', headers={'Authorization': f'Bearer {settings.OPENAI_API_KEY}'})
-        health_status['openai'] = response.status_code == 200
-        logger.info(f'OpenAI connection status: Healthy')
-    except Exception as e:
-        health_status['openai'] = False
-        logger.error(f'OpenAI connection failed: {e}')
+# Result of the last OpenAI probe, reused for HEALTH_CHECK_TTL seconds
+_health_status = {'checked_at': None, 'openai': False}
 
-    return JSONResponse(content=health_status)
+async def check_openai_health() -> bool:
+    """
+    Check connectivity to OpenAI, reusing the last result for
+    HEALTH_CHECK_TTL seconds so frequent health checks do not each make
+    an outbound request. Checks that arrive while a probe is running get
+    the previous result.
+    
+    :return: True if OpenAI is reachable
+    """
+    now = time.monotonic()
+    checked_at = _health_status['checked_at']
+    
+    if checked_at is None or now - checked_at >= settings.HEALTH_CHECK_TTL:
+        # Claim the probe before awaiting it, so concurrent checks reuse
+        # the previous result instead of each starting their own probe
+        _health_status['checked_at'] = now
+        
+        # Check OpenAI connection
+        try:
+            response = await run_in_threadpool(
+                requests.get,
+                'https://api.openai.com/v1/models',
+                headers={'Authorization': f'Bearer {settings.OPENAI_API_KEY}'},
+                timeout=settings.HEALTH_CHECK_TIMEOUT
+            )
+            _health_status['openai'] = response.status_code == 200
+            logger.info("OpenAI connection status: Healthy")
+        except Exception as e:
+            _health_status['openai'] = False
+            logger.error("OpenAI connection failed: %s", e)
+    
+    return _health_status['openai']
+
+class HealthCheckApp:
+    """
+    Bare ASGI app serving the health check.
+    
+    Container probes hit this constantly, so it skips FastAPI's routing,
+    dependency and serialization layers and sends a pre-encoded response.
+    """
+    async def __call__(self, scope, receive, send):
+        headers, body = HEALTH_RESPONSES[await check_openai_health()]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body, "more_body": False})
+
+health_app = HealthCheckApp()
 
 @router.post("/responses")
-async def save_response(request: Request, response_data: Dict[str, Any]):
+async def save_response(request: Request, response_data: ResponsePayload = Depends(parse_response_payload)):
     """
     Save user responses to the current session.
     
@@ -216,49 +387,39 @@ async def save_response(request: Request, response_data: Dict[str, Any]):
     :return: Confirmation of saved responses
     """
     try:
-        # Use the session ID from the request body if provided
-        session_id = response_data.get('session_id') or get_session_id(request)
-        
-        # Retrieve or create session
-        session = session_manager.get_session(session_id)
-        if not session:
-            session_id = session_manager.create_session()
-            session = session_manager.get_session(session_id)
-        
-        # Get current user data
-        user_data = session._session_data['user_data']
-        
-        # Initialize responses if not exists
-        if 'responses' not in user_data:
-            user_data['responses'] = {}
-        
-        # Handle multiple response formats
-        if 'question_id' in response_data and 'response' in response_data:
+        single = response_data.question_id is not None and response_data.response is not None
+        if single:
             # Single response format
-            user_data['responses'][response_data['question_id']] = response_data['response']
-        elif 'responses' in response_data and isinstance(response_data['responses'], dict):
+            new_responses = {response_data.question_id: response_data.response}
+        elif response_data.responses is not None:
             # Multiple responses format
-            user_data['responses'].update(response_data['responses'])
+            new_responses = response_data.responses
         else:
             # If neither format is recognized, raise an error
             raise APIError("Invalid response format", status_code=400)
         
-        # Update session with modified responses
-        updated = session_manager.update_session(session_id, {
-            'responses': user_data['responses']
-        })
+        # Use the session ID from the request body if provided
+        session_id = response_data.session_id or (await current_session(request)).session_id
+        
+        # Write into the stored responses, starting a new session if needed
+        if single:
+            session_id, updated = session_manager.set_response(
+                session_id, response_data.question_id, response_data.response
+            )
+        else:
+            session_id, updated = session_manager.get_and_append_responses(session_id, new_responses)
         
         if not updated:
             raise APIError("Failed to save responses", status_code=400)
         
-        logger.info(f"Saved responses: {user_data['responses']}")
+        logger.debug("Saved responses: %s", new_responses)
         
         # Create response with session cookie
-        response = JSONResponse(content={
+        response = ORJSONResponse(content={
             "success": True, 
             "message": "Responses saved successfully",
             "session_id": session_id,
-            "saved_responses": list(user_data['responses'].keys())
+            "saved_responses": list(new_responses)
         })
         
         # Set session cookie
@@ -266,44 +427,44 @@ async def save_response(request: Request, response_data: Dict[str, Any]):
         
         return response
     
+    except APIError:
+        # Re-raise APIErrors to be handled by FastAPI
+        raise
+    
     except Exception as e:
-        logger.error(f"Error saving responses: {e}", exc_info=True)
+        logger.error("Error saving responses: %s", e, exc_info=True)
         raise APIError(f"Unable to save responses: {str(e)}", status_code=500)
 
 @router.get("/responses")
-async def get_responses(request: Request):
+async def get_responses(session: Session = Depends(current_session)):
     """
     Retrieve saved responses for the current session.
     
-    :param request: Incoming request
+    :param session: Current session
     :return: Saved responses
     """
     try:
-        session_id = get_session_id(request)
-        session = session_manager.get_session(session_id)
-        
         if not session:
             raise APIError("No session found", status_code=404)
         
-        # Get user data from the session
-        user_data = session._session_data['user_data']
+        # Get saved responses from the session
+        responses = session.get_user_field('responses')
         
-        if 'responses' not in user_data:
+        if responses is None:
             raise APIError("No responses found", status_code=404)
         
-        return {
+        return ORJSONResponse({
             "success": True,
-            "responses": user_data['responses']
-        }
+            "responses": responses
+        })
     
     except Exception as e:
-        logger.error(f"Error retrieving responses: {e}")
+        logger.error("Error retrieving responses: %s", e)
         raise APIError("Unable to retrieve responses", status_code=500)
 
-@router.get("/results")
-async def get_results(request: Request, session_id: Optional[str] = None):
+async def generate_results(request: Request, session_id: Optional[str] = None) -> Dict[str, Any]:
     """
-    Retrieve Ikigai results for the current session.
+    Generate (or fetch the stored) Ikigai results for a session.
     
     :param request: Incoming request
     :param session_id: Optional session ID to retrieve results for
@@ -312,46 +473,39 @@ async def get_results(request: Request, session_id: Optional[str] = None):
     try:
         # If no session ID provided, get current session
         if not session_id:
-            session_id = get_session_id(request)
-        
-        # Retrieve session data using the proper method
-        session = session_manager.get_session(session_id)
+            session = await current_session(request)
+            session_id = session.session_id
+        else:
+            session = session_manager.get_session(session_id)
         
         if not session:
             raise APIError("No results found for this session", status_code=404)
         
         # Access user responses from the session object
-        user_responses = session._session_data['user_data'].get('responses', {})
+        user_responses = session.get_responses()
         
         # Log the retrieved responses for debugging
-        logger.info(f"Retrieved user responses: {user_responses}")
-        
-        # Validate required keys
-        required_keys = ['good_at', 'love', 'world_needs', 'paid_for']
+        logger.debug("Retrieved user responses: %s", user_responses)
         
-        # If responses are numeric keys, try to map them to required keys
-        if all(isinstance(key, int) for key in user_responses.keys()):
-            if len(user_responses) == len(required_keys):
-                mapped_responses = dict(zip(required_keys, user_responses.values()))
-                logger.info(f"Mapped numeric responses to required keys: {mapped_responses}")
-                user_responses = mapped_responses
-            else:
-                logger.warning(f"Numeric responses do not match required keys. Found: {list(user_responses.keys())}")
-                raise APIError("Incomplete user responses", status_code=400)
+        # Map numeric question IDs onto the Ikigai element keys
+        user_responses = {
+            RESPONSE_KEY_MAP.get(key, key): value
+            for key, value in user_responses.items()
+        }
         
         # Validate mapped or original responses
-        if not all(key in user_responses for key in required_keys):
-            logger.warning(f"Missing required response keys. Found: {list(user_responses.keys())}")
+        if not REQUIRED_KEY_SET.issubset(user_responses):
+            logger.warning("Missing required response keys. Found: %s", list(user_responses.keys()))
             raise APIError("Incomplete user responses", status_code=400)
         
         # Additional validation to ensure responses are not just 'testing'
-        if all(response.lower() == 'testing' for response in user_responses.values()):
+        if all(
+            isinstance(response, str) and response.strip().lower() in PLACEHOLDER_RESPONSES
+            for response in user_responses.values()
+        ):
             logger.warning("All responses are 'testing'. Please provide meaningful responses.")
             raise APIError("Responses must be more specific than 'testing'", status_code=400)
         
-        # Generate Ikigai paths
-        from app.services.openai_service import generate_ikiguide
-        
         try:
             # Generate Ikigai paths
             ikiguide_result = await generate_ikiguide(
@@ -359,11 +513,11 @@ async def get_results(request: Request, session_id: Optional[str] = None):
                 session_id=session_id
             )
             
-            logger.info(f"Successfully retrieved Ikigai paths for session {session_id}")
+            logger.info("Successfully retrieved Ikigai paths for session %s", session_id)
             return ikiguide_result
         
         except Exception as generate_error:
-            logger.error(f"Error generating Ikigai paths: {generate_error}", exc_info=True)
+            logger.error("Error generating Ikigai paths: %s", generate_error, exc_info=True)
             raise APIError("Failed to generate Ikigai paths", status_code=500)
     
     except APIError:
@@ -371,9 +525,93 @@ async def get_results(request: Request, session_id: Optional[str] = None):
         raise
     
     except Exception as e:
-        logger.error(f"Unexpected error retrieving results: {e}", exc_info=True)
+        logger.error("Unexpected error retrieving results: %s", e, exc_info=True)
         raise APIError("Unable to retrieve results", status_code=500)
 
+@router.get("/results")
+async def get_results(request: Request, session_id: Optional[str] = None):
+    """
+    Retrieve Ikigai results for the current session.
+    
+    :param request: Incoming request
+    :param session_id: Optional session ID to retrieve results for
+    :return: Ikigai results
+    """
+    return ORJSONResponse(await generate_results(request, session_id))
+
+def render_results_email(results: Dict[str, Any], note: Optional[str] = None) -> str:
+    """
+    Render the HTML body of the results email.
+    
+    :param results: Ikigai results as returned by generate_results
+    :param note: Optional note from the user to append
+    :return: HTML email body
+    """
+    # Extract paths and summary
+    paths = []
+    summary = ""
+    for i in range(0, len(results["paths"]), 2):
+        if results["paths"][i] == "SUMMARY":
+            summary = results["paths"][i + 1]
+            break
+        paths.append({
+            "title": results["paths"][i],
+            "description": results["paths"][i + 1]
+        })
+
+    return f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; color: #232222;">
+        <div style="text-align: center; margin-bottom: 30px;">
+            <img src="https://www.nova-mentis.com/web/image/website/1/logo/Nova%20Mentis?unique=3cdc8f3" alt="Nova Mentis Logo" style="max-width: 200px; margin-bottom: 20px;">
+            <h1 style="color: #37715B; font-size: 28px;">Your Ikiguide Journey</h1>
+            <p style="color: #5C7C95;">Discovering Your Perfect Career Path</p>
+        </div>
+
+        <div style="background: linear-gradient(to right, #f8f9fa, #e9ecef); padding: 25px; border-radius: 12px; margin-bottom: 35px; border: 1px solid #37715B;">
+            <h2 style="color: #37715B; font-size: 22px; margin-top: 0;">Your Ikigai Elements</h2>
+            <div style="display: grid; grid-template-columns: 1fr; gap: 15px;">
+                <div style="background: white; padding: 15px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05);">
+                    <p style="margin: 0;"><span style="color: #37715B; font-weight: bold;">What you are good at:</span><br>
+                    {results["user_responses"]["good_at"]}</p>
+                </div>
+                <div style="background: white; padding: 15px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05);">
+                    <p style="margin: 0;"><span style="color: #D5AF37; font-weight: bold;">What you love doing:</span><br>
+                    {results["user_responses"]["love"]}</p>
+                </div>
+                <div style="background: white; padding: 15px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05);">
+                    <p style="margin: 0;"><span style="color: #A14B2A; font-weight: bold;">What the world needs:</span><br>
+                    {results["user_responses"]["world_needs"]}</p>
+                </div>
+                <div style="background: white; padding: 15px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05);">
+                    <p style="margin: 0;"><span style="color: #9A6FB0; font-weight: bold;">What you can be paid for:</span><br>
+                    {results["user_responses"]["paid_for"]}</p>
+                </div>
+            </div>
+        </div>
+
+        <h2 style="color: #37715B; font-size: 24px; margin-bottom: 20px;">Recommended Career Paths</h2>
+        {"".join(f'''
+        <div style="margin-bottom: 25px; padding: 25px; background-color: white; border-radius: 12px; box-shadow: 0 3px 6px rgba(0,0,0,0.1); border: 1px solid #D5AF37;">
+            <h3 style="color: #37715B; margin-top: 0; font-size: 20px; border-bottom: 2px solid #D5AF37; padding-bottom: 10px;">{path["title"]}</h3>
+            <p style="color: #232222; line-height: 1.8; margin: 15px 0 0 0;">{path["description"]}</p>
+        </div>
+        ''' for path in paths)}
+
+        <div style="background: linear-gradient(to right, #f8f9fa, #e9ecef); padding: 25px; border-radius: 12px; margin-top: 35px; border: 1px solid #37715B;">
+            <h2 style="color: #37715B; font-size: 22px; margin-top: 0;">Summary</h2>
+            <p style="color: #232222; line-height: 1.8; margin: 15px 0 0 0;">{summary}</p>
+        </div>
+
+        {f'<div style="margin-top: 35px; padding: 20px; background-color: #f8f9fa; border-radius: 8px; border: 1px solid #5C7C95;"><p style="margin: 0;"><strong style="color: #37715B;">Additional Note:</strong> {note}</p></div>' if note else ''}
+
+        <div style="text-align: center; margin-top: 40px; padding-top: 20px; border-top: 1px solid #D5AF37;">
+            <p style="color: #5C7C95; font-size: 14px;">Brought to you by the Nova Mentis team</p>
+        </div>
+    </body>
+    </html>
+    """
+
 @router.post("/email_results")
 async def email_results(request: Request, email_data: Dict[str, str]):
     """
@@ -384,11 +622,8 @@ async def email_results(request: Request, email_data: Dict[str, str]):
     :return: Email sending status
     """
     try:
-        # Get session ID (synchronous call)
-        session_id = get_session_id(request)
-        
         # Retrieve results for the current session (await the result)
-        results = await get_results(request, session_id)
+        results = await generate_results(request)
         
         # Validate email
         if not email_data.get('email'):
@@ -403,119 +638,50 @@ async def email_results(request: Request, email_data: Dict[str, str]):
         # Validate Azure configuration with detailed logging
         if not settings.validate_azure_config():
             logger.error("Azure configuration validation failed")
-            logger.error(f"Tenant ID present: {bool(tenant_id)}")
-            logger.error(f"Client ID present: {bool(client_id)}")
-            logger.error(f"Client Secret present: {bool(client_secret)}")
-            logger.error(f"Sender Email present: {bool(sender_email)}")
+            logger.error("Tenant ID present: %s", bool(tenant_id))
+            logger.error("Client ID present: %s", bool(client_id))
+            logger.error("Client Secret present: %s", bool(client_secret))
+            logger.error("Sender Email present: %s", bool(sender_email))
             raise APIError("Azure AD configuration is incomplete or invalid", status_code=500)
         
-        logger.info(f"Attempting to send email. Sender: {sender_email}, Recipient: {email_data['email']}")
+        logger.info("Attempting to send email. Sender: %s, Recipient: %s", sender_email, email_data['email'])
         
-        # Authenticate and get access token
-        authority = f"https://login.microsoftonline.com/{tenant_id}"
-        try:
-            app = msal.ConfidentialClientApplication(
-                client_id,
-                authority=authority,
-                client_credential=client_secret
-            )
-        except Exception as app_init_error:
-            logger.error(f"Failed to initialize MSAL application: {str(app_init_error)}")
+        # Authenticate with the shared MSAL application
+        msal_app = await get_msal_app()
+        if msal_app is None:
+            logger.error("MSAL application is not available")
             raise APIError("Failed to initialize authentication", status_code=500)
         
         # Acquire token
         scopes = ["https://graph.microsoft.com/.default"]
         
         try:
-            # First try silent token acquisition
-            result = app.acquire_token_silent(scopes, account=None)
-            
-            # If silent acquisition fails, acquire token directly
-            if not result:
-                result = app.acquire_token_for_client(scopes=scopes)
+            # Serve the token from MSAL's cache, only hitting Azure AD on a miss
+            async with _get_msal_lock():
+                result = (
+                    msal_app.acquire_token_silent(scopes, account=None)
+                    or await run_in_threadpool(msal_app.acquire_token_for_client, scopes=scopes)
+                )
             
             # Validate token acquisition
             if "access_token" not in result:
                 error_description = result.get('error_description', 'Unknown token acquisition error')
-                logger.error(f"Token acquisition failed: {error_description}")
+                logger.error("Token acquisition failed: %s", error_description)
                 raise APIError(f"Failed to acquire token: {error_description}", status_code=500)
             
             logger.info("Token acquired successfully")
         
         except Exception as token_error:
-            logger.error(f"Token acquisition exception: {str(token_error)}", exc_info=True)
+            logger.error("Token acquisition exception: %s", token_error, exc_info=True)
             raise APIError(f"Token acquisition failed: {str(token_error)}", status_code=500)
 
         # Prepare email payload
-        # Extract paths and summary
-        paths = []
-        summary = ""
-        for i in range(0, len(results["paths"]), 2):
-            if results["paths"][i] == "SUMMARY":
-                summary = results["paths"][i + 1]
-                break
-            paths.append({
-                "title": results["paths"][i],
-                "description": results["paths"][i + 1]
-            })
-
         email_payload = {
             "message": {
                 "subject": "Your Ikiguide Career Path Results",
                 "body": {
                     "contentType": "HTML",
-                    "content": f"""
-                    <html>
-                    <body style="font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; color: #232222;">
-                        <div style="text-align: center; margin-bottom: 30px;">
-                            <img src="https://www.nova-mentis.com/web/image/website/1/logo/Nova%20Mentis?unique=3cdc8f3" alt="Nova Mentis Logo" style="max-width: 200px; margin-bottom: 20px;">
-                            <h1 style="color: #37715B; font-size: 28px;">Your Ikiguide Journey</h1>
-                            <p style="color: #5C7C95;">Discovering Your Perfect Career Path</p>
-                        </div>
-                        
-                        <div style="background: linear-gradient(to right, #f8f9fa, #e9ecef); padding: 25px; border-radius: 12px; margin-bottom: 35px; border: 1px solid #37715B;">
-                            <h2 style="color: #37715B; font-size: 22px; margin-top: 0;">Your Ikigai Elements</h2>
-                            <div style="display: grid; grid-template-columns: 1fr; gap: 15px;">
-                                <div style="background: white; padding: 15px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05);">
-                                    <p style="margin: 0;"><span style="color: #37715B; font-weight: bold;">What you are good at:</span><br>
-                                    {results["user_responses"]["good_at"]}</p>
-                                </div>
-                                <div style="background: white; padding: 15px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05);">
-                                    <p style="margin: 0;"><span style="color: #D5AF37; font-weight: bold;">What you love doing:</span><br>
-                                    {results["user_responses"]["love"]}</p>
-                                </div>
-                                <div style="background: white; padding: 15px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05);">
-                                    <p style="margin: 0;"><span style="color: #A14B2A; font-weight: bold;">What the world needs:</span><br>
-                                    {results["user_responses"]["world_needs"]}</p>
-                                </div>
-                                <div style="background: white; padding: 15px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05);">
-                                    <p style="margin: 0;"><span style="color: #9A6FB0; font-weight: bold;">What you can be paid for:</span><br>
-                                    {results["user_responses"]["paid_for"]}</p>
-                                </div>
-                            </div>
-                        </div>
-
-                        <h2 style="color: #37715B; font-size: 24px; margin-bottom: 20px;">Recommended Career Paths</h2>
-                        {"".join([f'''
-                        <div style="margin-bottom: 25px; padding: 25px; background-color: white; border-radius: 12px; box-shadow: 0 3px 6px rgba(0,0,0,0.1); border: 1px solid #D5AF37;">
-                            <h3 style="color: #37715B; margin-top: 0; font-size: 20px; border-bottom: 2px solid #D5AF37; padding-bottom: 10px;">{path["title"]}</h3>
-                            <p style="color: #232222; line-height: 1.8; margin: 15px 0 0 0;">{path["description"]}</p>
-                        </div>
-                        ''' for path in paths])}
-
-                        <div style="background: linear-gradient(to right, #f8f9fa, #e9ecef); padding: 25px; border-radius: 12px; margin-top: 35px; border: 1px solid #37715B;">
-                            <h2 style="color: #37715B; font-size: 22px; margin-top: 0;">Summary</h2>
-                            <p style="color: #232222; line-height: 1.8; margin: 15px 0 0 0;">{summary}</p>
-                        </div>
-
-                        {f'<div style="margin-top: 35px; padding: 20px; background-color: #f8f9fa; border-radius: 8px; border: 1px solid #5C7C95;"><p style="margin: 0;"><strong style="color: #37715B;">Additional Note:</strong> {email_data.get("message", "")}</p></div>' if email_data.get("message") else ''}
-                        
-                        <div style="text-align: center; margin-top: 40px; padding-top: 20px; border-top: 1px solid #D5AF37;">
-                            <p style="color: #5C7C95; font-size: 14px;">Brought to you by the Nova Mentis team</p>
-                        </div>
-                    </body>
-                    </html>
-                    """
+                    "content": render_results_email(results, email_data.get("message"))
                 },
                 "toRecipients": [
                     {
@@ -537,27 +703,28 @@ async def email_results(request: Request, email_data: Dict[str, str]):
                     }
                 } for bcc in settings.EMAIL_BCC.split(',')
             ]
-            logger.info(f"Added BCC recipients from settings: {settings.EMAIL_BCC}")
+            logger.info("Added BCC recipients from settings: %s", settings.EMAIL_BCC)
         
-        logger.info(f"Email payload prepared for {email_data['email']}")
+        logger.info("Email payload prepared for %s", email_data['email'])
         
         # Send email via Microsoft Graph API
-        send_mail_url = f"https://graph.microsoft.com/v1.0/users/{sender_email}/sendMail"
+        send_mail_url = f"/v1.0/users/{sender_email}/sendMail"
         headers = {
             'Authorization': f'Bearer {result["access_token"]}',
             'Content-Type': 'application/json'
         }
         
         try:
-            response = requests.post(send_mail_url, headers=headers, json=email_payload, timeout=10)
+            response = await _graph_client.post(send_mail_url, headers=headers, content=orjson.dumps(email_payload))
             
             # Enhanced logging for response
-            logger.info(f"Email send response status: {response.status_code}")
-            logger.info(f"Email send response content: {response.text}")
+            logger.info("Email send response status: %s", response.status_code)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Email send response content: %s", response.text)
             
             # Check response
             if response.status_code not in [200, 201, 202]:
-                logger.error(f"Email sending failed. Status: {response.status_code}, Content: {response.text}")
+                logger.error("Email sending failed. Status: %s, Content: %s", response.status_code, response.text)
                 raise APIError(f"Failed to send email: {response.text}", status_code=500)
             
             return {
@@ -566,12 +733,12 @@ async def email_results(request: Request, email_data: Dict[str, str]):
                 "recipient": email_data['email']
             }
         
-        except requests.RequestException as req_error:
-            logger.error(f"Request error sending email: {str(req_error)}", exc_info=True)
+        except httpx.HTTPError as req_error:
+            logger.error("Request error sending email: %s", req_error)
             raise APIError(f"Email sending request failed: {str(req_error)}", status_code=500)
     
     except Exception as e:
-        logger.error(f"Comprehensive error emailing results: {str(e)}", exc_info=True)
+        logger.error("Comprehensive error emailing results: %s", e, exc_info=True)
         raise APIError(f"Failed to email results: {str(e)}", status_code=500)
 
 @router.post("/reset_session")
@@ -579,31 +746,34 @@ async def reset_session(session_data: dict, request: Request):
     """
     Endpoint to reset a specific session.
     
-    Clears all session-related data without creating a new session.
+    Discards all session-related data and replaces the session with a new,
+    empty one in a single step.
     
     :param session_data: Dictionary containing session information
     :param request: Incoming request
     :return: Session reset confirmation
     """
     try:
-        # Extract session ID from the request or session data
-        session_id = session_data.get('session_id') or get_session_id(request)
+        # Extract session ID from the session data or cookie
+        session_id = session_data.get('session_id') or get_cookie_session_id(request)
         
         if not session_id:
             raise APIError("No session ID provided", status_code=400)
         
         # Log the session reset attempt
-        logger.info(f"Resetting session: {session_id}")
+        logger.info("Resetting session: %s", session_id)
         
-        # Terminate the existing session
-        await end_session(request)
+        # Swap the existing session for a fresh one
+        new_session_id = session_manager.reset(session_id)
         
-        return {
+        response = ORJSONResponse(content={
             "status": "success",
             "message": "Session reset successfully",
-            "new_session_id": None  # Explicitly do not create a new session
-        }
+            "new_session_id": new_session_id
+        })
+        set_session_cookie(response, new_session_id)
+        return response
     
     except Exception as e:
-        logger.error(f"Error resetting session: {e}", exc_info=True)
-        raise APIError("Unable to reset session", status_code=500)
\ No newline at end of file
+        logger.error("Error resetting session: %s", e, exc_info=True)
+        raise APIError("Unable to reset session", status_code=500)
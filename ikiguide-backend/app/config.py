@@ -1,20 +1,25 @@
 import os
 import base64
+import hashlib
 import secrets
-from typing import List, Optional
+import functools
+import types
+from typing import Optional, Tuple
 import dotenv
 import logging
 
 # Load .env file explicitly
 dotenv.load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
 
+# Read-only snapshot of the environment, taken once after .env is loaded
+_ENV = types.MappingProxyType(dict(os.environ))
+
 from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=4)
 def generate_key(password: str, salt: Optional[bytes] = None) -> bytes:
     """
     Generate a consistent encryption key
@@ -22,81 +27,89 @@ def generate_key(password: str, salt: Optional[bytes] = None) -> bytes:
     if salt is None:
         salt = b'ikiguide_fixed_salt_2024'
     
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=salt,
-        iterations=100000,
-    )
-    return base64.urlsafe_b64encode(kdf.derive(password.encode()))
+    derived = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, 100000, dklen=32)
+    return base64.urlsafe_b64encode(derived)
+
+def load_encryption_key(password: str) -> bytes:
+    """
+    Load the pre-derived Fernet key from IKIGUIDE_FERNET_KEY, falling back
+    to deriving it from the password
+    """
+    fernet_key = _ENV.get('IKIGUIDE_FERNET_KEY')
+    if fernet_key:
+        return fernet_key.encode()
+    return generate_key(password)
 
-def encrypt_secret(secret: str, key: bytes) -> str:
+def encrypt_secret(secret: str, fernet: Fernet) -> str:
     """
     Encrypt a secret using Fernet symmetric encryption
     """
-    f = Fernet(key)
-    return f.encrypt(secret.encode()).decode()
+    return fernet.encrypt(secret.encode()).decode()
 
-def decrypt_secret(encrypted_secret: str, key: bytes) -> Optional[str]:
+def decrypt_secret(encrypted_secret: str, fernet: Fernet) -> Optional[str]:
     """
     Decrypt a secret using Fernet symmetric encryption
     """
-    f = Fernet(key)
     try:
-        return f.decrypt(encrypted_secret.encode()).decode()
+        return fernet.decrypt(encrypted_secret.encode()).decode()
     except Exception as e:
         logger.error(f"Error decrypting secret: {e}")
         return None
 
-def load_cors_origins() -> List[str]:
+def load_cors_origins() -> Tuple[str, ...]:
     """
     Load CORS origins from environment variable with fallback
     """
-    cors_origins_str = os.getenv('CORS_ORIGINS', 'http://localhost:3000')
-    return [origin.strip() for origin in cors_origins_str.split(',') if origin.strip()]
+    cors_origins_str = _ENV.get('CORS_ORIGINS', '')
+    origins = tuple(origin.strip() for origin in cors_origins_str.split(',') if origin.strip())
+    return origins or ('http://localhost:3000',)
 
 class Settings:
     """
     Secure configuration management with encryption
     """
     # Application Environment
-    APP_NAME = os.getenv('APP_NAME', 'Ikiguide')
-    APP_ENV = os.getenv('APP_ENV', 'development')
+    APP_NAME = _ENV.get('APP_NAME', 'Ikiguide')
+    APP_ENV = _ENV.get('APP_ENV', 'development')
     
     # Logging Configuration
-    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
-    LOG_DIR = os.getenv('LOG_DIR', 'logs')
+    LOG_LEVEL = _ENV.get('LOG_LEVEL', 'WARNING' if APP_ENV == 'production' else 'INFO')
+    LOG_DIR = _ENV.get('LOG_DIR', 'logs')
     
     # CORS Configuration
     CORS_ORIGINS = load_cors_origins()
-    ALLOWED_ORIGINS = os.getenv('ALLOWED_ORIGINS', '').split(',') if os.getenv('ALLOWED_ORIGINS') else []
+    ALLOWED_ORIGINS = _ENV.get('ALLOWED_ORIGINS', '').split(',') if _ENV.get('ALLOWED_ORIGINS') else []
     
     # Session Configuration
-    SESSION_MAX_AGE = int(os.getenv('SESSION_MAX_AGE', 3600))
-    SESSION_MAX_TIMEOUT = int(os.getenv('SESSION_MAX_TIMEOUT', 24))
-    SESSION_MAX_CONCURRENT = int(os.getenv('SESSION_MAX_CONCURRENT', 1000))
+    SESSION_MAX_AGE = int(_ENV.get('SESSION_MAX_AGE', 3600))
+    SESSION_MAX_TIMEOUT = int(_ENV.get('SESSION_MAX_TIMEOUT', 24))
+    SESSION_MAX_CONCURRENT = int(_ENV.get('SESSION_MAX_CONCURRENT', 1000))
+    SESSION_COOKIE_SECURE = APP_ENV != 'development'
     
     # Encryption Configuration
     _ENCRYPTION_PASSWORD = 'ikiguide_secret_encryption_key_2024'
-    _ENCRYPTION_KEY = generate_key(_ENCRYPTION_PASSWORD)
+    _ENCRYPTION_KEY = load_encryption_key(_ENCRYPTION_PASSWORD)
+    _FERNET = Fernet(_ENCRYPTION_KEY)
     
     # Secure OpenAI Configuration
-    _ENCRYPTED_OPENAI_API_KEY = os.getenv('ENCRYPTED_OPENAI_API_KEY', '')
-    OPENAI_API_KEY = decrypt_secret(_ENCRYPTED_OPENAI_API_KEY, _ENCRYPTION_KEY) if _ENCRYPTED_OPENAI_API_KEY else ''
+    _ENCRYPTED_OPENAI_API_KEY = _ENV.get('ENCRYPTED_OPENAI_API_KEY', '')
+    OPENAI_API_KEY = decrypt_secret(_ENCRYPTED_OPENAI_API_KEY, _FERNET) if _ENCRYPTED_OPENAI_API_KEY else ''
+    # Check the key with a free models.list() call when the service starts
+    VERIFY_OPENAI_ON_STARTUP = _ENV.get('VERIFY_OPENAI_ON_STARTUP', 'false').lower() in ('1', 'true', 'yes')
     
     # Azure Email Configuration
-    _ENCRYPTED_AZURE_TENANT_ID = os.getenv('ENCRYPTED_AZURE_TENANT_ID', '')
-    AZURE_TENANT_ID = decrypt_secret(_ENCRYPTED_AZURE_TENANT_ID, _ENCRYPTION_KEY) if _ENCRYPTED_AZURE_TENANT_ID else ''
+    _ENCRYPTED_AZURE_TENANT_ID = _ENV.get('ENCRYPTED_AZURE_TENANT_ID', '')
+    AZURE_TENANT_ID = decrypt_secret(_ENCRYPTED_AZURE_TENANT_ID, _FERNET) if _ENCRYPTED_AZURE_TENANT_ID else ''
     
-    _ENCRYPTED_AZURE_CLIENT_ID = os.getenv('ENCRYPTED_AZURE_CLIENT_ID', '')
-    AZURE_CLIENT_ID = decrypt_secret(_ENCRYPTED_AZURE_CLIENT_ID, _ENCRYPTION_KEY) if _ENCRYPTED_AZURE_CLIENT_ID else ''
+    _ENCRYPTED_AZURE_CLIENT_ID = _ENV.get('ENCRYPTED_AZURE_CLIENT_ID', '')
+    AZURE_CLIENT_ID = decrypt_secret(_ENCRYPTED_AZURE_CLIENT_ID, _FERNET) if _ENCRYPTED_AZURE_CLIENT_ID else ''
     
-    _ENCRYPTED_AZURE_CLIENT_SECRET = os.getenv('ENCRYPTED_AZURE_CLIENT_SECRET', '')
-    AZURE_CLIENT_SECRET = decrypt_secret(_ENCRYPTED_AZURE_CLIENT_SECRET, _ENCRYPTION_KEY) if _ENCRYPTED_AZURE_CLIENT_SECRET else ''
+    _ENCRYPTED_AZURE_CLIENT_SECRET = _ENV.get('ENCRYPTED_AZURE_CLIENT_SECRET', '')
+    AZURE_CLIENT_SECRET = decrypt_secret(_ENCRYPTED_AZURE_CLIENT_SECRET, _FERNET) if _ENCRYPTED_AZURE_CLIENT_SECRET else ''
     
-    EMAIL_FROM = os.getenv('EMAIL_FROM', '')
+    EMAIL_FROM = _ENV.get('EMAIL_FROM', '')
 
-    EMAIL_BCC = os.getenv('EMAIL_BCC', '')
+    EMAIL_BCC = _ENV.get('EMAIL_BCC', '')
     
     # Debug logging for Azure configuration
     @classmethod
@@ -117,8 +130,18 @@ class Settings:
         return all([cls.AZURE_TENANT_ID, cls.AZURE_CLIENT_ID, cls.AZURE_CLIENT_SECRET, cls.EMAIL_FROM])
 
     # API Configuration
-    API_HOST = os.getenv('API_HOST', 'localhost')
-    API_PORT = int(os.getenv('API_PORT', 8000))
+    API_HOST = _ENV.get('API_HOST', 'localhost')
+    API_PORT = int(_ENV.get('API_PORT', 8000))
+    
+    # Seconds to reuse the last /health probe result
+    HEALTH_CHECK_TTL = int(_ENV.get('HEALTH_CHECK_TTL', 30))
+    
+    # Seconds to wait for the /health probe of OpenAI
+    HEALTH_CHECK_TIMEOUT = float(_ENV.get('HEALTH_CHECK_TIMEOUT', 5))
+    
+    # On-disk cache of generated paths, keyed by the user's responses
+    RESULTS_CACHE_DIR = _ENV.get('RESULTS_CACHE_DIR', 'cache/results')
+    RESULTS_CACHE_TTL = int(_ENV.get('RESULTS_CACHE_TTL', 30 * 24 * 3600))
     
     @classmethod
     def encrypt_and_store_secret(cls, secret: str, env_var_name: str) -> str:
@@ -129,7 +152,7 @@ class Settings:
         :param env_var_name: The environment variable name to store the encrypted secret
         :return: The encrypted secret
         """
-        encrypted_secret = encrypt_secret(secret, cls._ENCRYPTION_KEY)
+        encrypted_secret = encrypt_secret(secret, cls._FERNET)
         print(f"Encrypted Secret: {encrypted_secret}")
         print(f"Set the following environment variable:")
         print(f"export {env_var_name}={encrypted_secret}")
@@ -1,12 +1,12 @@
 import os
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Enum
+from sqlalchemy import create_engine, event, Column, Integer, String, DateTime, Boolean, Enum
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.sql import func
 from datetime import datetime
 from dotenv import load_dotenv
 import enum
-import uuid
+import secrets
 
 # Load environment variables
 load_dotenv()
@@ -17,7 +17,25 @@ DATABASE_PATH = os.path.join(BASE_DIR, '..', 'ikiguide.db')
 
 # Create SQLAlchemy engine
 DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    pool_size=20,
+    max_overflow=0
+)
+
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Enable WAL journaling so readers don't block behind the writer,
+    and relax fsyncs to once per checkpoint.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
 
 # Create a SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -73,7 +91,7 @@ def generate_verification_token():
     
     :return: Verification token
     """
-    return str(uuid.uuid4())
+    return secrets.token_urlsafe(16)
 
 def get_db():
     """
@@ -92,6 +110,3 @@ def init_db():
     Initialize the database by creating all tables.
     """
     Base.metadata.create_all(bind=engine)
-
-# Initialize database when this module is imported
-init_db()
@@ -1,10 +1,12 @@
 import os
-from fastapi import FastAPI
+import orjson
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from app.config import settings
-from app.api.endpoints import router as api_router, APIError, api_error_handler
+from app.api.endpoints import router as api_router, APIError, ORJSONResponse, api_error_handler, close_http_client, health_app
 from app.models.logger import logger
+from app.services.openai_service import close_openai_client
 
 def create_app() -> FastAPI:
     """
@@ -16,13 +18,16 @@ def create_app() -> FastAPI:
         title=settings.APP_NAME,
         description="API for generating personalized Ikigai paths",
         version="1.1.0",
+        default_response_class=ORJSONResponse,
     )
 
     # Add global exception handler
     app.add_exception_handler(APIError, api_error_handler)
 
     # Configure CORS with more robust handling
-    cors_origins = settings.CORS_ORIGINS or ["http://0.0.0.0:3000"]
+    # A frozenset makes the middleware's per-request origin check O(1);
+    # load_cors_origins never returns an empty tuple
+    cors_origins = frozenset(settings.CORS_ORIGINS)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=cors_origins,
@@ -31,6 +36,9 @@ def create_app() -> FastAPI:
         allow_headers=["*"]
     )
 
+    # Serve the health check as a bare ASGI app, ahead of the API router
+    app.add_route("/api/health", health_app, methods=["GET"], include_in_schema=False)
+
     # Include API router
     app.include_router(api_router, prefix="/api")
 
@@ -39,30 +47,35 @@ def create_app() -> FastAPI:
         """
         Log application startup with configuration details.
         """
-        logger.info(f"Starting {settings.APP_NAME} in {settings.APP_ENV} environment")
-        logger.info(f"CORS Origins: {cors_origins}")
-        logger.info(f"Logging Level: {settings.LOG_LEVEL}")
+        logger.info("Starting %s in %s environment", settings.APP_NAME, settings.APP_ENV)
+        logger.info("CORS Origins: %s", cors_origins)
+        logger.info("Logging Level: %s", settings.LOG_LEVEL)
 
     @app.on_event("shutdown")
     async def shutdown_event():
         """
         Log application shutdown.
         """
-        logger.info(f"Shutting down {settings.APP_NAME}")
+        logger.info("Shutting down %s", settings.APP_NAME)
+        await close_http_client()
+        await close_openai_client()
+
+    # The root response never changes, so encode it once
+    root_body = orjson.dumps({
+        "message": "Welcome to IKIGUIDE API!",
+        "version": "1.1.0",
+        "status": "Running",
+        "environment": settings.APP_ENV
+    })
 
     @app.get("/")
     async def root():
         """
         Root endpoint providing basic API information.
         
-        :return: Dictionary with API details
+        :return: Pre-encoded JSON with API details
         """
-        return {
-            "message": "Welcome to IKIGUIDE API!",
-            "version": "1.1.0",
-            "status": "Running",
-            "environment": settings.APP_ENV
-        }
+        return Response(content=root_body, media_type="application/json")
 
     return app
 
@@ -75,4 +88,6 @@ if __name__ == "__main__":
         "main:app", 
         host=settings.API_HOST, 
         port=settings.API_PORT, 
+        loop="uvloop",
+        http="httptools",
     )
@@ -1,13 +1,60 @@
+import atexit
 import logging
+import queue
 import sys
 import os
-from logging.handlers import TimedRotatingFileHandler
+import threading
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener, MemoryHandler
 from pathlib import Path
 from app.config import settings
 
+class BatchedFileHandler(TimedRotatingFileHandler):
+    """
+    Rotating file handler that leaves writes in a large file buffer and
+    only pushes them to the OS when explicitly flushed.
+    """
+    WRITE_BUFFER_SIZE = 64 * 1024
+
+    def _open(self):
+        return self._builtin_open(self.baseFilename, self.mode, buffering=self.WRITE_BUFFER_SIZE,
+                                  encoding=self.encoding, errors=self.errors)
+
+    def emit(self, record):
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+class BatchingMemoryHandler(MemoryHandler):
+    """MemoryHandler that flushes its target once after handing over a batch."""
+
+    def flush(self):
+        super().flush()
+        self.acquire()
+        try:
+            if self.target:
+                self.target.flush()
+        finally:
+            self.release()
+
 class LoggingManager:
     _instance = None
     _initialized = False
+    _listener = None
+    _queue_handler = None
+    _buffers = ()
+    _flush_stop = None
+
+    # Records held per sink before a bulk write, and the longest a record
+    # may sit in the buffer before the periodic flush writes it out
+    BUFFER_CAPACITY = 512
+    FLUSH_INTERVAL = 2.0
 
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
@@ -41,12 +88,13 @@ class LoggingManager:
             log_path = Path(directory)
             log_path.mkdir(exist_ok=True, parents=True)
 
-        # Configure logging levels with robust error handling
-        try:
-            self.logger.setLevel(level)
-        except AttributeError:
+        # Resolve the level name to its number once for the logger and handlers
+        numeric_level = logging.getLevelName(str(level).upper())
+        if not isinstance(numeric_level, int):
             print(f"WARNING: Invalid log level {level}. Defaulting to INFO.")
-            self.logger.setLevel("INFO")  # Set to INFO if provided level is invalid
+            numeric_level = logging.INFO  # Set to INFO if provided level is invalid
+        level = numeric_level
+        self.logger.setLevel(level)
 
         # Clear any existing handlers to prevent duplicate logging
         self.logger.handlers.clear()
@@ -56,11 +104,10 @@ class LoggingManager:
         console_handler.setLevel(level)
         console_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         console_handler.setFormatter(console_formatter)
-        self.logger.addHandler(console_handler)
 
         # Create file handler
         log_file = os.path.join(directory, 'app.log')
-        file_handler = TimedRotatingFileHandler(
+        file_handler = BatchedFileHandler(
             log_file,
             when='midnight',
             interval=1,
@@ -70,7 +117,71 @@ class LoggingManager:
         file_handler.setLevel(level)
         file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         file_handler.setFormatter(file_formatter)
-        self.logger.addHandler(file_handler)
+
+        # Batch records per sink so they reach stdout and disk in bulk
+        # writes; errors are flushed immediately along with what preceded them
+        self._buffers = tuple(
+            self._buffered(handler, level) for handler in (console_handler, file_handler)
+        )
+
+        # Write both sinks from a background thread so request handlers
+        # only enqueue records instead of blocking on I/O and rotation
+        log_queue = queue.Queue(-1)
+        self._listener = QueueListener(log_queue, *self._buffers, respect_handler_level=True)
+        self._listener.start()
+        self._queue_handler = QueueHandler(log_queue)
+        self.logger.addHandler(self._queue_handler)
+
+        # Bound how long a buffered record can wait before it is written
+        self._flush_stop = threading.Event()
+        threading.Thread(target=self._flush_periodically, name="log-flusher", daemon=True).start()
+        atexit.register(self.stop)
+
+    def _buffered(self, handler: logging.Handler, level) -> BatchingMemoryHandler:
+        """
+        Wrap a handler in a MemoryHandler that writes records in batches.
+        
+        :param handler: Handler that performs the actual output
+        :param level: Level applied to the buffering handler
+        :return: Buffering handler targeting ``handler``
+        """
+        buffered = BatchingMemoryHandler(
+            capacity=self.BUFFER_CAPACITY,
+            flushLevel=logging.ERROR,
+            target=handler,
+            flushOnClose=True,
+        )
+        buffered.setLevel(level)
+        return buffered
+
+    def _flush_periodically(self):
+        """Flush the buffered sinks every FLUSH_INTERVAL seconds until stopped."""
+        while not self._flush_stop.wait(self.FLUSH_INTERVAL):
+            self.flush()
+
+    def flush(self):
+        """Write out any buffered log records."""
+        for buffered in self._buffers:
+            buffered.flush()
+
+    def stop(self):
+        """
+        Flush queued records and stop the background log writer.
+        
+        Records logged afterwards are written directly by the underlying
+        handlers instead of being queued for a listener that no longer runs.
+        """
+        if self._flush_stop is not None:
+            self._flush_stop.set()
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        self.flush()
+        if self._queue_handler is not None:
+            self.logger.removeHandler(self._queue_handler)
+            self._queue_handler = None
+            for buffered in self._buffers:
+                self.logger.addHandler(buffered.target)
 
     def get_logger(self):
         """Get the configured logger instance."""
@@ -82,9 +193,6 @@ logger = logging_manager.get_logger()
 logger.info("Logging system initialized successfully")
 
 # Suppress warnings
-logging.getLogger("openai").setLevel(logging.WARNING)
-logging.getLogger("requests").setLevel(logging.WARNING)
-logging.getLogger("urllib3").setLevel(logging.WARNING)
-logging.getLogger("httpx").setLevel(logging.WARNING)
-logging.getLogger("httpcore").setLevel(logging.WARNING)
-logging.getLogger("msal").setLevel(logging.WARNING)
\ No newline at end of file
+_NOISY_LOGGERS = ("openai", "requests", "urllib3", "httpx", "httpcore", "msal")
+for _name in _NOISY_LOGGERS:
+    logging.getLogger(_name).setLevel(logging.WARNING)
\ No newline at end of file
@@ -0,0 +1,14 @@
+import msgspec
+from typing import Dict, Optional
+
+class ResponsePayload(msgspec.Struct):
+    """
+    Request body for saving user responses.
+    
+    Either a single ``question_id``/``response`` pair or a ``responses``
+    mapping of question ID to response is expected.
+    """
+    session_id: Optional[str] = None
+    question_id: Optional[int] = None
+    response: Optional[str] = None
+    responses: Optional[Dict[int, str]] = None
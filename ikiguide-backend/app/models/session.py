@@ -1,30 +1,77 @@
+import contextlib
 import uuid
+import random
+import time
 from app.models.logger import logger
 import threading
-from datetime import datetime, timedelta
-from typing import Dict, Optional
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
 
 class SessionError(Exception):
     """Custom exception for session-related errors."""
     pass
 
+def _wall_clock_offset() -> float:
+    """
+    Seconds to add to a time.monotonic() reading to get a Unix timestamp.
+    
+    :return: Offset between the wall clock and the monotonic clock
+    """
+    return time.time() - time.monotonic()
+
 class SessionManager:
+    # Number of independently locked partitions of the session store
+    SHARD_COUNT = 16
+    # Run the expiry sweep on roughly one in CLEANUP_SAMPLE creations, and
+    # always if it has not run for CLEANUP_MAX_INTERVAL seconds
+    CLEANUP_SAMPLE = 100
+    CLEANUP_MAX_INTERVAL = 300
+    # Seconds between sweeps by the background reaper thread
+    REAPER_INTERVAL = 60
+    # Seconds before last_activity is refreshed again
+    ACTIVITY_RESOLUTION = 60
+
     def __init__(self, max_sessions: int = 1000, session_timeout: int = 24):
         """
         Initialize session manager with configurable max sessions and timeout.
         
+        Sessions are spread over SHARD_COUNT shards by session ID, each with
+        its own lock, so operations on different sessions rarely contend.
+        
         :param max_sessions: Maximum number of concurrent sessions
         :param session_timeout: Session timeout in hours
         """
-        self._sessions: Dict[str, Dict] = {}
+        # Sessions are only ever appended, so insertion order is creation order
+        self._shards: Tuple['OrderedDict[str, Dict]', ...] = tuple(
+            OrderedDict() for _ in range(self.SHARD_COUNT)
+        )
+        self._locks = tuple(threading.Lock() for _ in range(self.SHARD_COUNT))
+        self._last_cleanup = [time.monotonic()] * self.SHARD_COUNT
         self._max_sessions = max_sessions
         self._session_timeout = session_timeout
-        self._session_creation_lock = threading.Lock()
-        logger.info(f"SessionManager initialized: max_sessions={max_sessions}, timeout={session_timeout} hours")
+        self._session_timeout_seconds = session_timeout * 3600
+        logger.info("SessionManager initialized: max_sessions=%s, timeout=%s hours", max_sessions, session_timeout)
+
+        # Reap expired sessions even when no new sessions are being created
+        threading.Thread(target=self._reaper_loop, name="session-reaper", daemon=True).start()
+
+    def _session_count(self) -> int:
+        """
+        Count the sessions across all shards without taking their locks.
+        
+        :return: Total number of stored sessions
+        """
+        return sum(len(shard) for shard in self._shards)
 
-        # Clear any existing sessions when the application starts
-        self._sessions.clear()  # Clear all previous sessions
-        logger.info("Cleared previous sessions on startup.")
+    def _shard_index(self, session_id: Optional[str]) -> int:
+        """
+        Map a session ID to the index of the shard that stores it.
+        
+        :param session_id: Session ID
+        :return: Shard index
+        """
+        return hash(session_id) & (self.SHARD_COUNT - 1)
 
     def create_session(self, initial_data: Optional[Dict] = None) -> str:
         """
@@ -34,39 +81,93 @@ class SessionManager:
         :return: Session ID
         :raises SessionError: If session creation fails
         """
-        with self._session_creation_lock:
+        # Generate unique session ID
+        session_id = str(uuid.uuid4())
+        index = self._shard_index(session_id)
+        
+        with self._locks[index]:
             try:
-                # Cleanup expired and old sessions BEFORE creating a new one
-                self._cleanup_expired_sessions()
-
-                # Check if we've reached max sessions
-                if len(self._sessions) >= self._max_sessions:
-                    # Remove oldest session
-                    oldest_session = min(self._sessions, key=lambda k: self._sessions[k]['created_at'])
-                    del self._sessions[oldest_session]
-                    logger.warning(f"Max sessions reached. Removed oldest session: {oldest_session}")
-
-                # Generate unique session ID
-                session_id = str(uuid.uuid4())
-                
-                # Prepare session data
-                session_data = {
-                    'created_at': datetime.now(),
-                    'user_data': initial_data or {},
-                    'last_activity': datetime.now(),
-                    'user_responses': {}  # Consistent with previous implementation
-                }
-                
-                # Store session data
-                self._sessions[session_id] = session_data
-                
-                logger.info(f"Created new session: {session_id}")
+                self._insert_session_locked(index, session_id, initial_data)
+                logger.info("Created new session: %s", session_id)
                 return session_id
             
             except Exception as e:
-                logger.error(f"Failed to create session: {str(e)}")
+                logger.error("Failed to create session: %s", e)
                 raise SessionError(f"Session creation failed: {str(e)}")
 
+    def _insert_session_locked(self, index: int, session_id: str, initial_data: Optional[Dict] = None):
+        """
+        Store a new session in a shard. The caller must hold the shard's lock.
+        
+        :param index: Shard index for the session ID
+        :param session_id: New session ID
+        :param initial_data: Optional initial data to store in the session
+        """
+        shard = self._shards[index]
+        now = time.monotonic()
+        
+        # Occasionally cleanup expired sessions before creating a new one;
+        # the reaper thread and the size check below cover the rest
+        if (random.randrange(self.CLEANUP_SAMPLE) == 0
+                or now - self._last_cleanup[index] > self.CLEANUP_MAX_INTERVAL):
+            self._cleanup_expired_sessions(index, now)
+
+        # Check max sessions across all shards
+        while self._session_count() >= self._max_sessions:
+            # Remove oldest session
+            oldest_session = self._evict_oldest_locked(index)
+            if oldest_session is None:
+                break
+            logger.warning("Max sessions reached. Removed oldest session: %s", oldest_session)
+
+        # Prepare session data; timestamps are time.monotonic() readings
+        session_data = {
+            'created_at': now,
+            'user_data': initial_data or {},
+            'last_activity': now,
+            'user_responses': {}  # Consistent with previous implementation
+        }
+        
+        # Store session data
+        shard[session_id] = session_data
+
+    def _evict_oldest_locked(self, index: int) -> Optional[str]:
+        """
+        Remove the oldest session across all shards. The caller must hold
+        the lock of shard ``index``.
+        
+        Each shard's first entry is its oldest, so only the shard heads are
+        compared. Another shard's lock is only tried without blocking, so
+        two creators can never wait on each other; if it is busy, the
+        oldest session of shard ``index`` is removed instead.
+        
+        :param index: Shard index whose lock the caller holds
+        :return: Removed session ID, or None if there was nothing to remove
+        """
+        oldest_index, oldest_created = None, None
+        for candidate, shard in enumerate(self._shards):
+            try:
+                head = next(iter(shard.values()), None)
+            except RuntimeError:
+                # Shard changed while peeking; another creator is busy there
+                continue
+            if head is not None and (oldest_created is None or head['created_at'] < oldest_created):
+                oldest_index, oldest_created = candidate, head['created_at']
+        
+        if oldest_index is not None and oldest_index != index:
+            lock = self._locks[oldest_index]
+            if lock.acquire(blocking=False):
+                try:
+                    if self._shards[oldest_index]:
+                        return self._shards[oldest_index].popitem(last=False)[0]
+                finally:
+                    lock.release()
+        
+        shard = self._shards[index]
+        if shard:
+            return shard.popitem(last=False)[0]
+        return None
+
     def get_session(self, session_id: str) -> Optional['Session']:
         """
         Retrieve session data if it exists and is not expired.
@@ -75,22 +176,20 @@ class SessionManager:
         :return: Session object or None
         """
         try:
-            logger.info(f"Attempting to retrieve session: {session_id}")
-            logger.info(f"Current sessions: {list(self._sessions.keys())}")
+            logger.info("Attempting to retrieve session: %s", session_id)
             
-            session_data = self._sessions.get(session_id)
+            session_data = self._shards[self._shard_index(session_id)].get(session_id)
             
             if session_data:
-                # Update last activity timestamp
-                session_data['last_activity'] = datetime.now()
-                logger.info(f"Session found: {session_id}")
+                self._touch(session_data)
+                logger.info("Session found: %s", session_id)
                 return Session(session_id, session_data)
             
-            logger.warning(f"Attempted to access non-existent session: {session_id}")
+            logger.warning("Attempted to access non-existent session: %s", session_id)
             return None
         
         except Exception as e:
-            logger.error(f"Error retrieving session {session_id}: {str(e)}")
+            logger.error("Error retrieving session %s: %s", session_id, e)
             return None
 
     def update_session(self, session_id: str, data: Dict) -> bool:
@@ -102,21 +201,84 @@ class SessionManager:
         :return: True if update successful, False otherwise
         """
         try:
-            session = self.get_session(session_id)
-            if session:
-                # Update the session's internal dictionary
-                session._session_data['user_data'].update(data)
-                session._session_data['last_activity'] = datetime.now()
-                logger.info(f"Updated session: {session_id}")
-                return True
+            session_data = self._shards[self._shard_index(session_id)].get(session_id)
+            if session_data is None:
+                logger.warning("Cannot update non-existent session: %s", session_id)
+                return False
             
-            logger.warning(f"Cannot update non-existent session: {session_id}")
-            return False
+            session_data['user_data'].update(data)
+            self._touch(session_data)
+            logger.debug("Updated session: %s", session_id)
+            return True
         
         except Exception as e:
-            logger.error(f"Error updating session {session_id}: {str(e)}")
+            logger.error("Error updating session %s: %s", session_id, e)
             return False
 
+    def _touch(self, session_data: Dict):
+        """
+        Refresh a session's last activity time unless it is already recent.
+        
+        :param session_data: Stored session dictionary
+        """
+        now = time.monotonic()
+        if now - session_data['last_activity'] > self.ACTIVITY_RESOLUTION:
+            session_data['last_activity'] = now
+
+    def get_and_append_responses(self, session_id: Optional[str], responses: Dict) -> Tuple[str, bool]:
+        """
+        Merge responses into a session, creating the session if it does not exist.
+        
+        The merge happens under the session's shard lock; a missing session
+        is created with the responses already in place.
+        
+        :param session_id: Session ID to update
+        :param responses: Dictionary of question ID to response
+        :return: Tuple of (session ID the responses belong to, True if saved)
+        """
+        try:
+            index = self._shard_index(session_id)
+            with self._locks[index]:
+                session_data = self._shards[index].get(session_id)
+                if session_data is not None:
+                    session_data['user_data'].setdefault('responses', {}).update(responses)
+                    session_data['last_activity'] = time.monotonic()
+                    logger.info("Appended responses to session: %s", session_id)
+                    return session_id, True
+            
+            logger.warning("Session not found, creating a new one for responses: %s", session_id)
+            return self.create_session({'responses': dict(responses)}), True
+        
+        except Exception as e:
+            logger.error("Error appending responses to session %s: %s", session_id, e)
+            return session_id, False
+
+    def set_response(self, session_id: Optional[str], question_id: int, response: str) -> Tuple[str, bool]:
+        """
+        Store a single response in a session, creating the session if it does not exist.
+        
+        :param session_id: Session ID to update
+        :param question_id: Question the response answers
+        :param response: Response text
+        :return: Tuple of (session ID the response belongs to, True if saved)
+        """
+        try:
+            index = self._shard_index(session_id)
+            with self._locks[index]:
+                session_data = self._shards[index].get(session_id)
+                if session_data is not None:
+                    session_data['user_data'].setdefault('responses', {})[question_id] = response
+                    session_data['last_activity'] = time.monotonic()
+                    logger.info("Set response %s in session: %s", question_id, session_id)
+                    return session_id, True
+            
+            logger.warning("Session not found, creating a new one for responses: %s", session_id)
+            return self.create_session({'responses': {question_id: response}}), True
+        
+        except Exception as e:
+            logger.error("Error setting response in session %s: %s", session_id, e)
+            return session_id, False
+
     def delete_session(self, session_id: str) -> bool:
         """
         Delete a specific session.
@@ -124,49 +286,91 @@ class SessionManager:
         :param session_id: Session ID to delete
         :return: True if session was deleted, False otherwise
         """
-        try:
-            if session_id in self._sessions:
-                del self._sessions[session_id]
-                logger.info(f"Deleted session: {session_id}")
-                return True
+        index = self._shard_index(session_id)
+        with self._locks[index]:
+            try:
+                if self._shards[index].pop(session_id, None) is not None:
+                    logger.info("Deleted session: %s", session_id)
+                    return True
+                
+                logger.warning("Attempted to delete non-existent session: %s", session_id)
+                return False
             
-            logger.warning(f"Attempted to delete non-existent session: {session_id}")
-            return False
+            except Exception as e:
+                logger.error("Error deleting session %s: %s", session_id, e)
+                return False
+
+    def reset(self, old_session_id: Optional[str]) -> str:
+        """
+        Replace a session with a new, empty one in a single step.
         
-        except Exception as e:
-            logger.error(f"Error deleting session {session_id}: {str(e)}")
-            return False
+        Both shard locks are held, taken in index order, while the old
+        session is removed and the new one stored, so no reader sees the
+        old session gone before the new one exists.
+        
+        :param old_session_id: Session ID to discard
+        :return: New session ID
+        :raises SessionError: If session creation fails
+        """
+        session_id = str(uuid.uuid4())
+        old_index = self._shard_index(old_session_id)
+        index = self._shard_index(session_id)
+        
+        first, second = sorted((old_index, index))
+        with self._locks[first]:
+            with self._locks[second] if second != first else contextlib.nullcontext():
+                if self._shards[old_index].pop(old_session_id, None) is not None:
+                    logger.info("Deleted session: %s", old_session_id)
+                else:
+                    logger.warning("Attempted to reset non-existent session: %s", old_session_id)
+                
+                try:
+                    self._insert_session_locked(index, session_id)
+                    logger.info("Created new session: %s", session_id)
+                    return session_id
+                
+                except Exception as e:
+                    logger.error("Failed to create session: %s", e)
+                    raise SessionError(f"Session creation failed: {str(e)}")
+
+    def _reaper_loop(self):
+        """
+        Periodically remove expired sessions in the background, holding one
+        shard lock at a time.
+        """
+        while True:
+            time.sleep(self.REAPER_INTERVAL)
+            for index, lock in enumerate(self._locks):
+                with lock:
+                    try:
+                        self._cleanup_expired_sessions(index)
+                    except Exception as e:
+                        logger.error("Error cleaning up sessions: %s", e)
 
-    def _cleanup_expired_sessions(self):
+    def _cleanup_expired_sessions(self, index: int, now: Optional[float] = None):
         """
-        Remove sessions that have exceeded the timeout.
-        Maintains multiple sessions within the max_sessions limit.
+        Remove sessions in a shard that have exceeded the timeout.
+        The caller must hold the shard's lock.
+        
+        :param index: Shard index to clean up
+        :param now: Current time.monotonic() reading, if the caller has one
         """
-        now = datetime.now()
+        if now is None:
+            now = time.monotonic()
+        shard = self._shards[index]
+        self._last_cleanup[index] = now
+        cutoff = now - self._session_timeout_seconds
         
-        # Remove expired sessions first
-        expired_sessions = [
-            sid for sid, session in list(self._sessions.items())
-            if (now - session['created_at']) > timedelta(hours=self._session_timeout)
-        ]
+        # Sessions are in creation order, so expired ones form a prefix
+        expired_sessions = []
+        for sid, session in shard.items():
+            if session['created_at'] >= cutoff:
+                break
+            expired_sessions.append(sid)
         
         for sid in expired_sessions:
-            del self._sessions[sid]
-            logger.info(f"Cleaned up expired session: {sid}")
-        
-        # If we've exceeded max sessions, remove oldest sessions
-        if len(self._sessions) > self._max_sessions:
-            # Sort sessions by creation time, oldest first
-            sorted_sessions = sorted(
-                self._sessions.items(), 
-                key=lambda x: x[1]['created_at']
-            )
-            
-            # Remove oldest sessions until we're within the limit
-            while len(self._sessions) > self._max_sessions:
-                oldest_sid, _ = sorted_sessions.pop(0)
-                del self._sessions[oldest_sid]
-                logger.info(f"Removed oldest session to maintain max sessions: {oldest_sid}")
+            del shard[sid]
+            logger.info("Cleaned up expired session: %s", sid)
 
 class Session:
     def __init__(self, session_id: str, session_data: Dict):
@@ -214,10 +418,10 @@ class Session:
         """
         try:
             self._session_data['user_responses'] = responses
-            self._session_data['last_activity'] = datetime.now()
-            logger.info(f"Set user responses for session {self._session_id}")
+            self._session_data['last_activity'] = time.monotonic()
+            logger.info("Set user responses for session %s", self._session_id)
         except Exception as e:
-            logger.error(f"Error setting user responses for session {self._session_id}: {str(e)}")
+            logger.error("Error setting user responses for session %s: %s", self._session_id, e)
 
     def get_user_responses(self) -> Dict:
         """
@@ -227,6 +431,44 @@ class Session:
         """
         return self._session_data.get('user_responses', {})
 
+    def get_user_data(self) -> Dict:
+        """
+        Retrieve the user data stored in the session.
+        
+        :return: Dictionary of user data
+        """
+        return self._session_data['user_data']
+
+    def get_user_field(self, name: str, default: Any = None) -> Any:
+        """
+        Retrieve a single field from the session's user data.
+        
+        :param name: Field name
+        :param default: Value to return if the field is not set
+        :return: Field value or default
+        """
+        return self._session_data['user_data'].get(name, default)
+
+    def get_responses(self) -> Dict:
+        """
+        Retrieve the responses saved to the session.
+        
+        :return: Dictionary of question ID to response
+        """
+        return self.get_user_field('responses', {})
+
+    def get_timestamps(self) -> Tuple[datetime, datetime]:
+        """
+        Retrieve the session's creation and last activity times.
+        
+        :return: Tuple of (created_at, last_activity)
+        """
+        offset = _wall_clock_offset()
+        return (
+            datetime.fromtimestamp(offset + self._session_data['created_at']),
+            datetime.fromtimestamp(offset + self._session_data['last_activity'])
+        )
+
     @property
     def session_id(self) -> str:
         """
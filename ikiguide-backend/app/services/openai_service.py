@@ -1,4 +1,4 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 import os
 from dotenv import load_dotenv
 import logging
@@ -6,13 +6,47 @@ from app.models.logger import logger
 from app.models.session import session_manager
 from app.config import settings
 import asyncio
+import functools
+import hashlib
+import re
+from typing import Dict, List
+import orjson
+import httpx
+import diskcache
+from fastapi.concurrency import run_in_threadpool
 from tenacity import retry, stop_after_attempt, wait_exponential
-import concurrent.futures
 
 # Load environment variables
 load_dotenv()
 
-# Initialize OpenAI client
+def create_openai_http_client() -> httpx.AsyncClient:
+    """
+    Create the connection pool shared by every async OpenAI request.
+    
+    :return: HTTP/2 client with tuned pool limits and timeouts
+    """
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(60.0, connect=5.0),
+        limits=httpx.Limits(max_keepalive_connections=100, max_connections=200)
+    )
+
+_openai_http_client = create_openai_http_client()
+
+async def close_openai_client():
+    """
+    Close the HTTP client used for OpenAI requests and replace it with a
+    fresh one, so a later application lifespan can keep making requests.
+    """
+    global _openai_http_client, async_client
+    await _openai_http_client.aclose()
+    _openai_http_client = create_openai_http_client()
+    if async_client is not None:
+        async_client = async_client.with_options(http_client=_openai_http_client)
+
+# Initialize OpenAI clients; the async client serves requests
+client = None
+async_client = None
 try:
     logger.info("Attempting to initialize OpenAI client...")
     
@@ -20,8 +54,8 @@ try:
 
     
     # Log the environment variable status
-    logger.info(f"OpenAI API Key in environment: {'OPENAI_API_KEY' in os.environ}")
-    logger.info(f"OpenAI API Key length: {len(os.environ.get('OPENAI_API_KEY', ''))}")
+    logger.info("OpenAI API Key in environment: %s", 'OPENAI_API_KEY' in os.environ)
+    logger.info("OpenAI API Key length: %s", len(os.environ.get('OPENAI_API_KEY', '')))
     
     # Validate API key
     if not settings.OPENAI_API_KEY:
@@ -31,22 +65,28 @@ try:
         # Initialize client
         os.environ['OPENAI_API_KEY'] = settings.OPENAI_API_KEY
         client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        async_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, http_client=_openai_http_client)
         
         logger.info("OpenAI client initialized successfully!")
-        # Perform a quick test to validate the client
-        try:
-            test_response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[{"role": "user", "content": "Hello, can you confirm the client is working?"}]
-            )
-            logger.info("Client test successful!")
-        except Exception as test_error:
-            logger.error(f"Client test failed: {test_error}")
+        # Optionally validate the key without a paid completion
+        if settings.VERIFY_OPENAI_ON_STARTUP:
+            try:
+                client.models.list()
+                logger.info("Client test successful!")
+            except Exception as test_error:
+                logger.error("Client test failed: %s", test_error)
 
 except Exception as e:
-    logger.error(f"Error initializing OpenAI client: {e}")
-    logger.error(f"Exception type: {type(e).__name__}")
+    logger.error("Error initializing OpenAI client: %s", e)
+    logger.error("Exception type: %s", type(e).__name__)
+
 
+# Ikigai elements every set of responses must cover, in question order
+REQUIRED_KEYS = ('good_at', 'love', 'world_needs', 'paid_for')
+REQUIRED_KEY_SET = frozenset(REQUIRED_KEYS)
+
+# Question IDs (1-based) used by the frontend, mapped to Ikigai element keys
+RESPONSE_KEY_MAP = dict(enumerate(REQUIRED_KEYS, start=1))
 
 # Prompt template
 PROMPT_TEMPLATE = """
@@ -119,6 +159,137 @@ SUMMARY
 
 """
 
+# Completion settings for path requests
+OPENAI_MODEL = "gpt-4o"
+OPENAI_TEMPERATURE = 0.2
+
+# System message sent with every path request
+_SYSTEM_MESSAGE = {"role": "system", "content": "You are a career path advisor specializing in Ikigai."}
+
+# Fingerprint of everything besides the responses that shapes the generated
+# paths, so editing the prompt or model invalidates previously cached results
+_PROMPT_VERSION = hashlib.blake2b(
+    orjson.dumps([OPENAI_MODEL, OPENAI_TEMPERATURE, _SYSTEM_MESSAGE, PROMPT_TEMPLATE]),
+    digest_size=8
+).hexdigest()
+
+# Template text around the placeholders, which appear in REQUIRED_KEYS order
+_PROMPT_PARTS = re.split(r'\{(?:good_at|love|world_needs|paid_for)\}', PROMPT_TEMPLATE)
+assert len(_PROMPT_PARTS) == len(REQUIRED_KEYS) + 1
+
+@functools.lru_cache(maxsize=1024)
+def _format_prompt(good_at: str, love: str, world_needs: str, paid_for: str) -> str:
+    """
+    Fill the prompt template, reusing the result for repeated responses.
+    
+    :return: Formatted user prompt
+    """
+    head, after_good_at, after_love, after_world_needs, tail = _PROMPT_PARTS
+    return ''.join((
+        head, good_at, after_good_at, love, after_love,
+        world_needs, after_world_needs, paid_for, tail
+    ))
+
+# Completions currently being requested, keyed by a hash of the responses,
+# so identical concurrent requests share a single OpenAI call
+_inflight: Dict[str, asyncio.Task] = {}
+
+# Generated paths under the same key, shared across restarts and workers;
+# an unusable cache directory only disables caching
+try:
+    _results_cache = diskcache.Cache(settings.RESULTS_CACHE_DIR)
+except Exception as e:
+    logger.warning("Results cache disabled, unable to open %s: %s", settings.RESULTS_CACHE_DIR, e)
+    _results_cache = None
+
+def _responses_key(responses: Dict) -> str:
+    """
+    Hash the required responses, together with the prompt version, into a
+    stable key.
+    
+    :param responses: Normalized user responses
+    :return: Hex digest identifying the responses
+    """
+    canonical = orjson.dumps([_PROMPT_VERSION] + [responses[key] for key in REQUIRED_KEYS])
+    return hashlib.blake2b(canonical, digest_size=16).hexdigest()
+
+async def _fetch_paths(key: str, responses: Dict) -> List[str]:
+    """
+    Load Ikigai paths from the results cache, or request them from OpenAI
+    and cache the result.
+    
+    :param key: Cache key for the responses
+    :param responses: Normalized user responses
+    :return: List of generated path lines
+    """
+    # The cache is SQLite-backed, so read it off the event loop
+    cached = None
+    if _results_cache is not None:
+        cached = await run_in_threadpool(_results_cache.get, key)
+    if cached is not None:
+        logger.info("Returning cached Ikigai paths")
+        return cached
+    
+    # Responses stored through /update_session may not be strings;
+    # str() matches what PROMPT_TEMPLATE.format would have produced
+    formatted_prompt = _format_prompt(*(str(responses[name]) for name in REQUIRED_KEYS))
+    
+    # Await the OpenAI API call without tying up a thread
+    response = await async_client.chat.completions.create(
+        model=OPENAI_MODEL,
+        messages=[
+            _SYSTEM_MESSAGE,
+            {"role": "user", "content": formatted_prompt}
+        ],
+        temperature=OPENAI_TEMPERATURE
+    )
+    
+    paths_text = response.choices[0].message.content.strip()
+    paths = [path.strip() for path in paths_text.split('\n') if path.strip()]
+    
+    if _results_cache is not None:
+        try:
+            await run_in_threadpool(_results_cache.set, key, paths, expire=settings.RESULTS_CACHE_TTL)
+        except Exception as e:
+            logger.warning("Unable to cache Ikigai paths: %s", e)
+    return paths
+
+def _finish_inflight(key: str, task: asyncio.Task):
+    """
+    Drop a finished request from the in-flight map.
+    
+    :param key: Cache key the request was registered under
+    :param task: Finished request task
+    """
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    # Every caller may have been cancelled; mark the error as retrieved
+    if not task.cancelled():
+        task.exception()
+
+async def _complete_paths(responses: Dict) -> List[str]:
+    """
+    Request Ikigai paths from OpenAI, reusing cached paths for the same
+    responses and joining an identical request that is already in flight
+    instead of starting another.
+    
+    The request runs in its own task and every caller awaits it through
+    asyncio.shield, so cancelling one caller never cancels the shared work.
+    
+    :param responses: Normalized user responses
+    :return: List of generated path lines
+    """
+    key = _responses_key(responses)
+    task = _inflight.get(key)
+    if task is not None:
+        logger.info("Joining in-flight Ikigai path request")
+    else:
+        task = asyncio.create_task(_fetch_paths(key, responses))
+        _inflight[key] = task
+        task.add_done_callback(functools.partial(_finish_inflight, key))
+    
+    return await asyncio.shield(task)
+
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
 async def generate_ikiguide_with_retry(responses, session_id=None):
     """
@@ -131,20 +302,11 @@ async def generate_ikiguide_with_retry(responses, session_id=None):
     logger.info("Attempting to generate Ikigai paths with retry mechanism")
     
     # Validate responses
-    required_keys = ['good_at', 'love', 'world_needs', 'paid_for']
-    
     # Transform responses if they are using numeric keys
-    if all(isinstance(k, int) for k in responses.keys()):
-        logger.info("Transforming numeric response keys to expected keys")
-        responses = {
-            'good_at': responses.get(1, ''),
-            'love': responses.get(2, ''),
-            'world_needs': responses.get(3, ''),
-            'paid_for': responses.get(4, '')
-        }
+    responses = {RESPONSE_KEY_MAP.get(k, k): v for k, v in responses.items()}
     
-    if not all(key in responses for key in required_keys):
-        logger.error(f"Missing required response keys. Current keys: {list(responses.keys())}")
+    if not REQUIRED_KEY_SET.issubset(responses):
+        logger.error("Missing required response keys. Current keys: %s", list(responses.keys()))
         raise ValueError("Missing required response keys")
     
     # Determine or create session
@@ -157,9 +319,9 @@ async def generate_ikiguide_with_retry(responses, session_id=None):
         session = session_manager.get_session(session_id)
     
     # Check for existing paths
-    existing_paths = session._session_data['user_data'].get('ikiguide_paths')
+    existing_paths = session.get_user_field('ikiguide_paths')
     if existing_paths:
-        logger.info(f"Returning existing paths for session {session_id}")
+        logger.info("Returning existing paths for session %s", session_id)
         return {
             'session_id': session_id,
             'paths': existing_paths,
@@ -167,7 +329,7 @@ async def generate_ikiguide_with_retry(responses, session_id=None):
         }
     
     # Ensure OpenAI client is initialized
-    if not client:
+    if not async_client:
         logger.error("OpenAI client not initialized")
         return {
             'session_id': session_id,
@@ -176,33 +338,7 @@ async def generate_ikiguide_with_retry(responses, session_id=None):
         }
     
     try:
-        # Format prompt
-        formatted_prompt = PROMPT_TEMPLATE.format(
-            good_at=responses['good_at'],
-            love=responses['love'],
-            world_needs=responses['world_needs'],
-            paid_for=responses['paid_for']
-        )
-        
-        # Use a thread pool executor for running blocking I/O
-        with concurrent.futures.ThreadPoolExecutor() as pool:
-            # Run the OpenAI API call in a separate thread
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                pool, 
-                lambda: client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[
-                        {"role": "system", "content": "You are a career path advisor specializing in Ikigai."},
-                        {"role": "user", "content": formatted_prompt}
-                    ],
-                    temperature=0.2
-                )
-            )
-        
-        # Process response
-        paths_text = response.choices[0].message.content.strip()
-        paths = [path.strip() for path in paths_text.split('\n') if path.strip()]
+        paths = await _complete_paths(responses)
         
         # Store paths in session
         session_manager.update_session(session_id, {'ikiguide_paths': paths})
@@ -214,26 +350,19 @@ async def generate_ikiguide_with_retry(responses, session_id=None):
         }
     
     except Exception as e:
-        logger.error(f"Error generating Ikigai paths: {str(e)}")
+        logger.error("Error generating Ikigai paths: %s", e)
         return {
             'session_id': session_id,
             'paths': [f"ERROR: {str(e)}"],
             'user_responses': responses
         }
 
-# Update the original function to use the new async version
 async def generate_ikiguide(responses, session_id=None):
     """
-    Synchronous wrapper for async Ikigai path generation.
+    Generate Ikigai paths for the given responses.
     
     :param responses: Dictionary of user responses
     :param session_id: Optional session identifier
     :return: Dictionary with paths and session information
     """
-    # Use the async function directly instead of asyncio.run()
-    # This allows FastAPI to handle the async call
-    async def _async_generate():
-        return await generate_ikiguide_with_retry(responses, session_id)
-    
-    # Return the coroutine to be awaited by FastAPI
-    return await _async_generate()
\ No newline at end of file
+    return await generate_ikiguide_with_retry(responses, session_id)
\ No newline at end of file
@@ -1,9 +1,9 @@
 import os
 import base64
+import hashlib
 import getpass
+import argparse
 from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
 def generate_key(password: str, salt: bytes = None) -> bytes:
     """
@@ -12,28 +12,48 @@ def generate_key(password: str, salt: bytes = None) -> bytes:
     if salt is None:
         salt = b'ikiguide_fixed_salt_2024'
     
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=salt,
-        iterations=100000,
-    )
-    return base64.urlsafe_b64encode(kdf.derive(password.encode()))
+    derived = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, 100000, dklen=32)
+    return base64.urlsafe_b64encode(derived)
 
-def encrypt_secret(secret: str, key: bytes) -> str:
+def encrypt_secret(secret: str, fernet: Fernet) -> str:
     """
     Encrypt a secret using Fernet symmetric encryption
     """
-    f = Fernet(key)
-    return f.encrypt(secret.encode()).decode()
+    return fernet.encrypt(secret.encode()).decode()
 
-def main():
+def load_or_derive_key(cache_path: str = None) -> bytes:
+    """
+    Read the derived key from the cache file if present, otherwise prompt
+    for the password, derive the key and cache it (mode 0600)
+    """
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            return f.read().strip()
+    
     # Prompt for encryption password
     password = getpass.getpass("Enter encryption password: ")
     
     # Generate key from password
     key = generate_key(password)
     
+    if cache_path:
+        fd = os.open(cache_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(key)
+    return key
+
+def main():
+    parser = argparse.ArgumentParser(description="Encrypt Ikiguide secrets for the environment")
+    parser.add_argument(
+        '--cache-key',
+        metavar='PATH',
+        help="File to cache the derived key in; skips the password and key derivation on later runs",
+    )
+    args = parser.parse_args()
+    
+    key = load_or_derive_key(args.cache_key)
+    fernet = Fernet(key)
+    
     # Predefined secrets to collect
     secret_prompts = [
         ('ENCRYPTED_OPENAI_API_KEY', 'OpenAI API Key'),
@@ -55,8 +75,10 @@ def main():
     # Encrypt and print secrets
     if secrets:
         print("\nEncrypted Secrets:")
+        # Lets the app skip PBKDF2 key derivation at startup
+        print(f"IKIGUIDE_FERNET_KEY={key.decode()}")
         for env_var, secret in secrets.items():
-            encrypted = encrypt_secret(secret, key)
+            encrypted = encrypt_secret(secret, fernet)
             print(f"{env_var}={encrypted}")
     else:
         print("No secrets to encrypt.")